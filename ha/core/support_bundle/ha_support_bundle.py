@@ -18,15 +18,65 @@
 
 import sys
 import os
+import grp
+import pwd
+import copy
+import stat
+import functools
 import shutil
 import tarfile
 import argparse
+import subprocess
 
 from ha.core.error import SupportBundleError
-from ha.const import _DELIM, _sb_default_path, _sb_tar_name, _sb_tmp_src
+from ha.const import _DELIM, _sb_default_path, _sb_tar_name
 from cortx.utils.const import CLUSTER_CONF_LOG_KEY
 from cortx.utils.conf_store import Conf, MappedConf
 
+# Compressors run as a separate process, the tar stream is piped to them.
+# {compression: (file extension, command)}
+_sb_external_compressors = {
+    'zstd': ('.tar.zst', ['zstd', '-q', '-3', '-T0'])
+}
+# gzip level trading some size for speed, compression dominates tar time.
+_sb_gzip_level = 1
+_sb_bool_values = {'true': True, 'false': False}
+# Buffer used to copy file data into the tar, default of tarfile is 16 KiB.
+_sb_copy_bufsize = 2 * 1024 * 1024
+
+
+class _SupportBundleTarFile(tarfile.TarFile):
+    """
+    TarFile copying member data with a _sb_copy_bufsize buffer. TarFile
+    has copybufsize only from python 3.8. Live logs truncated while they
+    are copied are padded up to the size already written in the header.
+    """
+
+    def addfile(self, tarinfo, fileobj=None):
+        """Add tarinfo and size bytes of fileobj to the archive."""
+        self._check("awx")
+        tarinfo = copy.copy(tarinfo)
+        buf = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        self.fileobj.write(buf)
+        self.offset += len(buf)
+        if fileobj is not None:
+            _buffer = bytearray(min(tarinfo.size, _sb_copy_bufsize))
+            view = memoryview(_buffer)
+            remaining = tarinfo.size
+            while remaining:
+                read = fileobj.readinto(view[:min(remaining, _sb_copy_bufsize)])
+                if not read:
+                    self.fileobj.write(tarfile.NUL * remaining)
+                    break
+                self.fileobj.write(view[:read])
+                remaining -= read
+            blocks, remainder = divmod(tarinfo.size, tarfile.BLOCKSIZE)
+            if remainder > 0:
+                self.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+                blocks += 1
+            self.offset += blocks * tarfile.BLOCKSIZE
+        self.members.append(tarinfo)
+
 
 class HASupportBundle:
 
@@ -38,65 +88,162 @@ class HASupportBundle:
         # binlogs = filters.get('binlogs', False)
         # coredumps = filters.get('coredumps', False)
         # stacktrace = filters.get('stacktrace', False)
+        compression = filters.get('compression') or 'gz'
         # TODO process duration, size_limit, binlogs, coredumps and stacktrace
         # Find log dirs
         cluster_conf = MappedConf(cluster_conf_url)
         log_base = cluster_conf.get(CLUSTER_CONF_LOG_KEY)
         local_base = cluster_conf.get(
             f'cortx{_DELIM}common{_DELIM}storage{_DELIM}local')
-        machine_id = Conf.machine_id
+        machine_id = HASupportBundle.__get_machine_id()
+        log_dir = os.path.join(log_base, 'ha', machine_id)
+        conf_dir = os.path.join(local_base, 'ha')
 
-        if os.path.exists(_sb_tmp_src):
-            HASupportBundle.__clear_tmp_files()
-        else:
-            os.makedirs(_sb_tmp_src)
-        # Copy log files
-        shutil.copytree(os.path.join(log_base, f'ha/{machine_id}'),\
-            os.path.join(_sb_tmp_src, 'logs'))
-
-        # Copy configuration files
-        shutil.copytree(os.path.join(local_base, 'ha'),\
-            os.path.join(_sb_tmp_src, 'conf'))
-        HASupportBundle.__generate_tar(bundle_id, target_path)
-        HASupportBundle.__clear_tmp_files()
+        # Archive log and configuration files straight from their source
+        # directories instead of staging a copy of them first.
+        sources = {'logs': log_dir, 'conf': conf_dir}
+        HASupportBundle.__generate_tar(bundle_id, target_path, sources,
+            compression)
 
     @staticmethod
-    def __copy_file(source: str, destination: str = None):
-        """Copy a file from source to destination location."""
-        directory = os.path.dirname(_sb_tmp_src)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        if destination is None:
-            destination = os.path.join(_sb_tmp_src,
-                os.path.basename(source))
-        try:
-            shutil.copy2(source, destination)
-        except FileNotFoundError as fe:
-            raise SupportBundleError(f"File not found : {fe}")
+    @functools.lru_cache(maxsize=None)
+    def __get_machine_id() -> str:
+        """Get machine id of this node, read once per process."""
+        return Conf.machine_id
 
     @staticmethod
-    def __generate_tar(bundle_id: str, target_path: str):
-        """Generate tar.gz file at given path."""
+    def __generate_tar(bundle_id: str, target_path: str, sources: dict,
+            compression: str = 'gz'):
+        """Generate compressed tar file at given path from {arcname: source dir}."""
         component = 'ha'
         target_path = target_path if target_path is not None \
             else _sb_default_path
         target_path = os.path.join(target_path, component)
         tar_name = bundle_id if bundle_id else _sb_tar_name
-        tar_file_name = os.path.join(target_path, tar_name + '.tar.gz')
         if not os.path.exists(target_path):
             os.makedirs(target_path)
-        with tarfile.open(tar_file_name, 'w:gz') as tar:
-            tar.add(_sb_tmp_src,
-                arcname=os.path.basename(_sb_tmp_src))
+        if compression in _sb_external_compressors:
+            extension, cmd = _sb_external_compressors[compression]
+            tar_file_name = os.path.join(target_path, tar_name + extension)
+            HASupportBundle.__generate_piped_tar(tar_file_name, cmd, sources)
+            return
+        if compression != 'gz':
+            raise SupportBundleError(f"Unsupported compression : {compression}")
+        tar_file_name = os.path.join(target_path, tar_name + '.tar.gz')
+        if shutil.which('pigz') is not None:
+            # pigz writes gzip using all the cores.
+            HASupportBundle.__generate_piped_tar(tar_file_name,
+                ['pigz', f'-{_sb_gzip_level}'], sources)
+            return
+        with _SupportBundleTarFile.open(tar_file_name, 'w:gz',
+                compresslevel=_sb_gzip_level) as tar:
+            HASupportBundle.__add_sources(tar, sources)
+
+    @staticmethod
+    def __generate_piped_tar(tar_file_name: str, cmd: list, sources: dict):
+        """Stream an uncompressed tar through an external compressor."""
+        if shutil.which(cmd[0]) is None:
+            raise SupportBundleError(f"Compressor not found : {cmd[0]}")
+        with open(tar_file_name, 'wb') as out:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=out)
+            try:
+                with _SupportBundleTarFile.open(fileobj=proc.stdin, mode='w|',
+                        bufsize=_sb_copy_bufsize) as tar:
+                    HASupportBundle.__add_sources(tar, sources)
+            finally:
+                proc.stdin.close()
+                _rc = proc.wait()
+        if _rc != 0:
+            raise SupportBundleError(f"Failed to compress {tar_file_name}, "
+                f"{cmd[0]} exited with {_rc}")
 
     @staticmethod
-    def __clear_tmp_files():
-        """Clean temporary files created by the support bundle."""
-        shutil.rmtree(_sb_tmp_src)
+    def __add_sources(tar: tarfile.TarFile, sources: dict):
+        """Add each source directory to the tar file under its arcname."""
+        for arcname, source in sources.items():
+            try:
+                HASupportBundle.__add_tree(tar, source, arcname)
+            except OSError as oe:
+                raise SupportBundleError(f"Failed to add {source} : {oe}")
+
+    @staticmethod
+    def __add_tree(tar: tarfile.TarFile, source: str, arcname: str):
+        """
+        Add a directory and all of its contents, as they are walked.
+        Symlinks are followed as copytree did, files removed in between
+        (e.g. by log rotation) are skipped.
+        """
+        tar.addfile(HASupportBundle.__get_tarinfo(tar, arcname, os.stat(source)))
+        with os.scandir(source) as entries:
+            for entry in entries:
+                name = os.path.join(arcname, entry.name)
+                try:
+                    if entry.is_dir():
+                        HASupportBundle.__add_tree(tar, entry.path, name)
+                    elif entry.is_file():
+                        HASupportBundle.__add_file(tar, entry.path, name)
+                    # Sockets and other special files are skipped.
+                except FileNotFoundError:
+                    continue
+
+    @staticmethod
+    def __add_file(tar: tarfile.TarFile, path: str, arcname: str):
+        """Add a regular file, sized by stat of the opened file."""
+        with open(path, 'rb') as fileobj:
+            tarinfo = HASupportBundle.__get_tarinfo(tar, arcname,
+                os.fstat(fileobj.fileno()))
+            tar.addfile(tarinfo, fileobj)
+
+    @staticmethod
+    def __get_tarinfo(tar: tarfile.TarFile, arcname: str,
+            stat_result: os.stat_result) -> tarfile.TarInfo:
+        """
+        Create TarInfo for a regular file or directory.
+        TarFile.gettarinfo() looks up the owner and group names of every
+        member, here those lookups are cached by uid and gid.
+        """
+        mode = stat_result.st_mode
+        tarinfo = tar.tarinfo(arcname)
+        if stat.S_ISDIR(mode):
+            tarinfo.type = tarfile.DIRTYPE
+        else:
+            tarinfo.type = tarfile.REGTYPE
+            tarinfo.size = stat_result.st_size
+        tarinfo.mode = stat.S_IMODE(mode)
+        tarinfo.uid = stat_result.st_uid
+        tarinfo.gid = stat_result.st_gid
+        tarinfo.mtime = stat_result.st_mtime
+        tarinfo.uname = HASupportBundle.__get_uname(stat_result.st_uid)
+        tarinfo.gname = HASupportBundle.__get_gname(stat_result.st_gid)
+        return tarinfo
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __get_uname(uid: int) -> str:
+        """Get user name for uid, empty if it is unknown."""
+        try:
+            return pwd.getpwuid(uid)[0]
+        except KeyError:
+            return ''
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __get_gname(gid: int) -> str:
+        """Get group name for gid, empty if it is unknown."""
+        try:
+            return grp.getgrgid(gid)[0]
+        except KeyError:
+            return ''
 
     @staticmethod
     def parse_args():
         """Parsing support bundle arguments."""
+        return HASupportBundle.__get_parser().parse_args()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __get_parser() -> argparse.ArgumentParser:
+        """Build support bundle argument parser, once per process."""
         parser = argparse.ArgumentParser(description='''Bundle ha logs ''')
         parser.add_argument('-b', dest='bundle_id', help='Unique bundle id')
         parser.add_argument('-t', dest='path', help='Path to store the created bundle',
@@ -117,20 +264,20 @@ class HASupportBundle:
             help="Include/Exclude stacktrace, Default = False")
         parser.add_argument('--modules', dest='modules',
             help="list of components & services to generate support bundle.")
-        args=parser.parse_args()
-        return args
+        parser.add_argument('--compression', dest='compression', default='gz',
+            choices=['gz', *_sb_external_compressors],
+            help="Compression used for the bundle, zstd needs the zstd tool, Default - gz")
+        return parser
 
     @staticmethod
     def str2bool(value):
         """Converting string to boolean."""
         if isinstance(value, bool):
             return value
-        if value.lower() in ('true'):
-            return True
-        elif value.lower() in ('false'):
-            return False
-        else:
+        bool_value = _sb_bool_values.get(value.lower())
+        if bool_value is None:
             raise argparse.ArgumentTypeError('Boolean value expected.')
+        return bool_value
 
 def main():
     args = HASupportBundle.parse_args()
@@ -142,7 +289,8 @@ def main():
         size_limit = args.size_limit,
         binlogs = args.binlogs,
         coredumps = args.coredumps,
-        stacktrace = args.stacktrace
+        stacktrace = args.stacktrace,
+        compression = args.compression
     )
 
 
@@ -29,7 +29,10 @@ class SimpleCommand:
         Run command and throw error if cmd failed
 
         Args:
-            cmd ([string]): Command to execute on system.
+            cmd (str or list): Command to execute on system, a list is
+                passed to the process as is, without splitting on spaces.
+            check_error (bool): Raise exception if command failed.
+            secret (str): Value to hide in logged command.
 
         Raises:
             Exception: raise command failed exception.
@@ -39,7 +42,8 @@ class SimpleCommand:
             string: Command output.
         """
         try:
-            cmd_help = cmd.replace(secret, "****") if secret is not None else cmd
+            cmd_help = " ".join(cmd) if isinstance(cmd, list) else cmd
+            cmd_help = cmd_help.replace(secret, "****") if secret is not None else cmd_help
             _err = ""
             _proc = SimpleProcess(cmd)
             _output, _err, _rc = _proc.run(universal_newlines=True)
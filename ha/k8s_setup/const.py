@@ -44,6 +44,7 @@ class GconfKeys(enum.Enum):
     NODE_CONST = "node"
     SERVICE_CONST = "services"
     NAME_CONST = "name"
+    NODE_STORAGE = "node{_DELIM}{node_id}{_DELIM}storage"
     CVG_NAME = "node{_DELIM}{node_id}{_DELIM}storage{_DELIM}cvg[{cvg_index}]{_DELIM}name"
     CVG_COUNT = "node{_DELIM}{node_id}{_DELIM}storage{_DELIM}num_cvg"
     DATA_COUNT = "node{_DELIM}{node_id}{_DELIM}storage{_DELIM}cvg[{cvg_index}]{_DELIM}devices{_DELIM}num_data"
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Seagate Technology LLC and/or its Affiliates
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU Affero General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. See the GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>. For any questions
+# about this software or licensing, please email opensource@seagate.com or
+# cortx-questions@seagate.com.
+
+
+"""
+ ****************************************************************************
+ Description:       ConftStoreSearch lookups from node storage config
+ ****************************************************************************
+"""
+
+import unittest
+from unittest.mock import patch
+
+from ha.util.conf_store import ConftStoreSearch
+
+NODE_ID = '21d6291109304485b3daff43a06cff77'
+
+class TestConftStoreSearchStorage(unittest.TestCase):
+    """
+    Unit test for CVG and disk lists read from storage config of a node
+    """
+
+    def setUp(self):
+        # Lists are longer than their counts, only counted entries are used.
+        self.storage = {
+            'num_cvg': 2,
+            'cvg': [
+                {'name': 'cvg-01', 'devices': {'num_data': 2, 'data': ['/dev/sdc', '/dev/sdd', '/dev/sdx'],
+                                               'num_metadata': 1, 'metadata': ['/dev/sdb', '/dev/sdy']}},
+                {'name': 'cvg-02', 'devices': {'num_data': 1, 'data': ['/dev/sdf'],
+                                               'num_metadata': 0, 'metadata': ['/dev/sde']}},
+                {'name': 'cvg-03', 'devices': {'num_data': 1, 'data': ['/dev/sdg']}}
+            ]
+        }
+
+    @patch('ha.util.conf_store.Conf')
+    def test_get_cvg_list(self, patched_conf):
+        """
+        Test only num_cvg CVGs are listed and conf store is not read
+        """
+        cvg_list = ConftStoreSearch.get_cvg_list('cortx', NODE_ID, self.storage)
+        self.assertEqual(cvg_list, ['cvg-01', 'cvg-02'])
+        patched_conf.get.assert_not_called()
+
+    @patch('ha.util.conf_store.Conf')
+    def test_get_disk_list(self, patched_conf):
+        """
+        Test data and metadata disks of each CVG are sliced by their counts
+        """
+        disk_list = ConftStoreSearch.get_disk_list('cortx', NODE_ID, self.storage)
+        self.assertEqual(disk_list, ['/dev/sdc', '/dev/sdd', '/dev/sdb', '/dev/sdf'])
+        patched_conf.get.assert_not_called()
+
+    @patch('ha.util.conf_store.Log')
+    def test_no_cvg(self, patched_log):
+        """
+        Test empty lists are returned when node has no CVG
+        """
+        for storage in ({}, {'num_cvg': 0, 'cvg': self.storage['cvg']}):
+            self.assertEqual(ConftStoreSearch.get_cvg_list('cortx', NODE_ID, storage), [])
+            self.assertEqual(ConftStoreSearch.get_disk_list('cortx', NODE_ID, storage), [])
+        patched_log.warn.assert_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Seagate Technology LLC and/or its Affiliates
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU Affero General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. See the GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>. For any questions
+# about this software or licensing, please email opensource@seagate.com or
+# cortx-questions@seagate.com.
+
+
+"""
+ ****************************************************************************
+ Description:       HA support bundle generation and argument parsing
+ ****************************************************************************
+"""
+
+import argparse
+import builtins
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ha.core.support_bundle import ha_support_bundle
+from ha.core.support_bundle.ha_support_bundle import HASupportBundle
+
+class TestHASupportBundle(unittest.TestCase):
+    """
+    Unit test for HA support bundle
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def _write(self, path: str, data: bytes) -> str:
+        path = os.path.join(self.tmp_dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fi:
+            fi.write(data)
+        return path
+
+    def _generate(self) -> tarfile.TarFile:
+        """
+        Generate bundle of log and local dirs under tmp_dir with tarfile.
+        Returns: generated tar file opened for reading
+        """
+        log_base = os.path.join(self.tmp_dir, 'log')
+        local_base = os.path.join(self.tmp_dir, 'local')
+        with patch.object(ha_support_bundle, 'MappedConf') as patched_conf, \
+                patch.object(ha_support_bundle, 'Conf') as patched_machine_conf, \
+                patch.object(ha_support_bundle.shutil, 'which', return_value=None):
+            patched_conf.return_value.get.side_effect = lambda key: \
+                log_base if key == ha_support_bundle.CLUSTER_CONF_LOG_KEY else local_base
+            patched_machine_conf.machine_id = 'm1'
+            HASupportBundle._HASupportBundle__get_machine_id.cache_clear()
+            self.addCleanup(HASupportBundle._HASupportBundle__get_machine_id.cache_clear)
+            HASupportBundle.generate('bundle', os.path.join(self.tmp_dir, 'out'), 'yaml:///cluster.conf')
+        tar = tarfile.open(os.path.join(self.tmp_dir, 'out', 'ha', 'bundle.tar.gz'))
+        self.addCleanup(tar.close)
+        return tar
+
+    def test_generate(self):
+        """
+        Test log and conf dirs are archived, symlinks are followed and
+        dangling symlinks and files removed while walking are skipped
+        """
+        self._write('log/ha/m1/ha.log', b'log data')
+        self._write('log/ha/m1/sub/old.log', b'old data')
+        self._write('log/ha/m1/gone.log', b'removed')
+        self._write('local/ha/ha.conf', b'conf data')
+        real = self._write('outside/real.log', b'linked data')
+        os.symlink(real, os.path.join(self.tmp_dir, 'log/ha/m1/link.log'))
+        os.symlink(os.path.join(self.tmp_dir, 'missing'), os.path.join(self.tmp_dir, 'log/ha/m1/dangling.log'))
+        def open_removing(path, *args, **kwargs):
+            # Log rotation removes the file after it is listed.
+            if path.endswith('gone.log'):
+                os.remove(path)
+            return builtins.open(path, *args, **kwargs)
+        with patch.object(ha_support_bundle, 'open', side_effect=open_removing, create=True):
+            tar = self._generate()
+        self.assertEqual(sorted(tar.getnames()),
+                         ['conf', 'conf/ha.conf', 'logs', 'logs/ha.log', 'logs/link.log', 'logs/sub', 'logs/sub/old.log'])
+        contents = {'logs/ha.log': b'log data', 'logs/sub/old.log': b'old data',
+                    'logs/link.log': b'linked data', 'conf/ha.conf': b'conf data'}
+        for name, data in contents.items():
+            self.assertTrue(tar.getmember(name).isfile())
+            self.assertEqual(tar.extractfile(name).read(), data)
+        self.assertTrue(tar.getmember('logs/sub').isdir())
+
+    def test_generate_truncated(self):
+        """
+        Test file truncated while it is archived is padded to its size in header
+        """
+        path = self._write('log/ha/m1/ha.log', b'0123456789' * 1000)
+        os.makedirs(os.path.join(self.tmp_dir, 'local/ha'))
+        addfile = ha_support_bundle._SupportBundleTarFile.addfile
+        def truncating_addfile(tar, tarinfo, fileobj=None):
+            if fileobj is not None:
+                os.truncate(path, 5)
+            return addfile(tar, tarinfo, fileobj)
+        with patch.object(ha_support_bundle._SupportBundleTarFile, 'addfile', truncating_addfile):
+            tar = self._generate()
+        member = tar.getmember('logs/ha.log')
+        self.assertEqual(member.size, 10000)
+        self.assertEqual(tar.extractfile(member).read(), b'01234' + b'\0' * 9995)
+
+    def test_str2bool(self):
+        """
+        Test str2bool accepts true/false in any case and booleans as is
+        """
+        for value in ('true', 'True', 'TRUE'):
+            self.assertIs(HASupportBundle.str2bool(value), True)
+        for value in ('false', 'False', 'FALSE'):
+            self.assertIs(HASupportBundle.str2bool(value), False)
+        self.assertIs(HASupportBundle.str2bool(True), True)
+        self.assertIs(HASupportBundle.str2bool(False), False)
+
+    def test_str2bool_invalid(self):
+        """
+        Test str2bool rejects values other than true/false
+        """
+        for value in ('yes', '1', '', 'truee'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                HASupportBundle.str2bool(value)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Seagate Technology LLC and/or its Affiliates
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU Affero General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. See the GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>. For any questions
+# about this software or licensing, please email opensource@seagate.com or
+# cortx-questions@seagate.com.
+
+
+"""
+ ****************************************************************************
+ Description:       MessageBus wrapper producer and consumer
+ ****************************************************************************
+"""
+
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ha.util.message_bus import (CONSUMER_STATUS, SERIALIZER, BatchingProducer, ConsumerMultiplexer, MessageBus,
+                                 MessageBusConsumer, MessageBusProducer)
+
+class TestMessageBusProducerTemplate(unittest.TestCase):
+    """
+    Unit test for templated publish of MessageBusProducer
+    """
+
+    def setUp(self):
+        patcher = patch('ha.util.message_bus.MessageProducer')
+        self.producer = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.message_producer = MessageBusProducer("test_producer", "test_type", 1)
+
+    def test_template_splice(self):
+        """
+        Test varying fields are spliced after static fields
+        """
+        encoder = self.message_producer.prepare_template({'event': 'node', 'source': 'hw'})
+        self.assertEqual(json.loads(encoder({})), {'event': 'node', 'source': 'hw'})
+        message = encoder({'node_id': 'n1', 'status': 'offline'})
+        self.assertEqual(json.loads(message), {'event': 'node', 'source': 'hw', 'node_id': 'n1', 'status': 'offline'})
+
+    def test_template_override(self):
+        """
+        Test varying fields override static fields without repeating keys
+        """
+        encoder = self.message_producer.prepare_template({'event': 'node', 'source': 'hw'})
+        message = encoder({'source': 'k8s'})
+        self.assertEqual(json.loads(message), {'event': 'node', 'source': 'k8s'})
+        self.assertEqual(message.count('"source"'), 1)
+
+    def test_empty_template(self):
+        """
+        Test template without static fields encodes varying fields only
+        """
+        encoder = self.message_producer.prepare_template({})
+        self.assertEqual(json.loads(encoder({'a': 1})), {'a': 1})
+
+    def test_publish_templated(self):
+        """
+        Test publish_templated sends message made from prepared template
+        """
+        with self.assertRaises(Exception):
+            self.message_producer.publish_templated({'node_id': 'n1'})
+        self.message_producer.prepare_template({'event': 'node'})
+        self.message_producer.publish_templated({'node_id': 'n1'})
+        sent = self.producer.send.call_args[0][0]
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(json.loads(sent[0]), {'event': 'node', 'node_id': 'n1'})
+
+class TestBatchingProducer(unittest.TestCase):
+    """
+    Unit test for sends of BatchingProducer and MessageBusProducer.publish_many
+    """
+
+    def setUp(self):
+        for target in ('ha.util.message_bus.Log', 'ha.util.message_bus.MessageProducer'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.message_producer = MessageBusProducer("test_producer", "test_type", 1)
+        self.send = self.message_producer.producer.send
+
+    def _sent(self) -> list:
+        return [call[0][0] for call in self.send.call_args_list]
+
+    def test_max_messages(self):
+        """
+        Test batch is sent once max_messages are buffered
+        """
+        producer = BatchingProducer(self.message_producer, max_messages=3, linger=60)
+        for index in range(7):
+            producer.publish(f'm{index}')
+        self.assertEqual(self._sent(), [['m0', 'm1', 'm2'], ['m3', 'm4', 'm5']])
+        producer.flush()
+        self.assertEqual(self._sent()[-1], ['m6'])
+
+    def test_max_bytes(self):
+        """
+        Test batch is sent once max_bytes are buffered
+        """
+        producer = BatchingProducer(self.message_producer, max_bytes=10, linger=60)
+        for message in ('aaaa', 'bbbb', 'cccc', 'dd'):
+            producer.publish(message)
+        self.assertEqual(self._sent(), [['aaaa', 'bbbb', 'cccc']])
+        producer.flush()
+        self.assertEqual(self._sent()[-1], ['dd'])
+
+    def test_linger(self):
+        """
+        Test buffered messages are sent linger seconds after the first one
+        """
+        producer = BatchingProducer(self.message_producer, linger=0.01)
+        producer.publish({'a': 1})
+        producer.publish('m2')
+        for _ in range(100):
+            if self.send.called:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self._sent(), [['{"a":1}', 'm2']])
+
+    def test_flush(self):
+        """
+        Test flush sends buffered messages at once and nothing when empty
+        """
+        producer = BatchingProducer(self.message_producer, linger=60)
+        producer.flush()
+        self.send.assert_not_called()
+        producer.publish('m1')
+        producer.flush()
+        self.assertEqual(self._sent(), [['m1']])
+        self.assertIsNone(producer._timer)
+
+    def test_concurrent_publish(self):
+        """
+        Test sends keep max_messages and order of every publisher when
+        publishers race with a full batch
+        """
+        producer = BatchingProducer(self.message_producer, max_messages=10, linger=60)
+        # Slow send lets other publishers buffer more while a batch is sent.
+        self.send.side_effect = lambda batch: time.sleep(0.001)
+        def publish(name):
+            for index in range(200):
+                producer.publish(f'{name}-{index:03}')
+        threads = [threading.Thread(target=publish, args=(name,)) for name in 'abcd']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        producer.flush()
+        sent = self._sent()
+        self.assertTrue(all(len(batch) <= 10 for batch in sent))
+        messages = [message for batch in sent for message in batch]
+        self.assertEqual(len(messages), 800)
+        for name in 'abcd':
+            published = [message for message in messages if message[0] == name]
+            self.assertEqual(published, sorted(published))
+
+    def test_publish_many(self):
+        """
+        Test publish_many sends encoded messages in one send
+        """
+        self.message_producer.publish_many([])
+        self.send.assert_not_called()
+        self.message_producer.publish_many([{'a': 1}, 'm2'])
+        self.assertEqual(self._sent(), [['{"a":1}', 'm2']])
+        with self.assertRaises(Exception):
+            self.message_producer.publish_many([1])
+
+def drive_consumer(consumer: MessageBusConsumer, messages: list, events: list) -> list:
+    """
+    Run consumer loop against a mocked MessageConsumer till messages are
+    consumed. Receive returns None once when messages run out, so messages
+    in flight get acked, and stops consumer on the next receive.
+    Returns: events with ('receive', message) and ('ack',) added in order.
+    """
+    queue = list(messages)
+    idle = []
+    consumer.consumer = MagicMock()
+    def receive(timeout):
+        if queue:
+            events.append(('receive', queue[0]))
+            return queue.pop(0)
+        if idle:
+            consumer._stop.set()
+        idle.append(True)
+        return None
+    consumer.consumer.receive.side_effect = receive
+    consumer.consumer.ack.side_effect = lambda: events.append(('ack',))
+    consumer.run()
+    return events
+
+def run_consumer(messages: list, callback, **kwargs) -> list:
+    """
+    Run MessageBusConsumer with callback, see drive_consumer.
+    Returns: list of ('receive', message), ('callback', message) and ('ack',)
+    in order.
+    """
+    events = []
+    def process(message):
+        events.append(('callback', message))
+        return callback(message)
+    consumer = MessageBusConsumer(1, "test_group", "test_type", process, False, "earliest", 0, **kwargs)
+    return drive_consumer(consumer, messages, events)
+
+class TestMessageBusConsumerAck(unittest.TestCase):
+    """
+    Unit test for acks sent by MessageBusConsumer against a mocked MessageConsumer
+    """
+
+    def setUp(self):
+        patcher = patch('ha.util.message_bus.Log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, messages: list, statuses: list, **kwargs) -> list:
+        statuses = iter(statuses)
+        return run_consumer(messages, lambda message: next(statuses), **kwargs)
+
+    def test_ack_every_message(self):
+        """
+        Test every successful message is acked by default
+        """
+        events = self._run(['m1', 'm2'], [CONSUMER_STATUS.SUCCESS] * 2)
+        self.assertEqual(events, [('receive', 'm1'), ('callback', 'm1'), ('ack',),
+                                  ('receive', 'm2'), ('callback', 'm2'), ('ack',)])
+
+    def test_ack_batch(self):
+        """
+        Test acks are sent per ack_batch_size messages and when bus is idle
+        """
+        events = self._run(['m1', 'm2', 'm3', 'm4'], [CONSUMER_STATUS.SUCCESS] * 4, ack_batch_size=3)
+        self.assertEqual([event for event in events if event[0] != 'callback'],
+                         [('receive', 'm1'), ('receive', 'm2'), ('receive', 'm3'), ('ack',),
+                          ('receive', 'm4'), ('ack',)])
+
+    def test_ack_batch_ms(self):
+        """
+        Test ack_batch_ms is counted from the oldest message waiting for ack
+        """
+        clock = [0]
+        times = {'m1': 1.0, 'm2': 1.05, 'm3': 1.2, 'm4': 1.25}
+        def callback(message):
+            clock[0] = times[message]
+            return CONSUMER_STATUS.SUCCESS
+        with patch('ha.util.message_bus.time') as patched_time:
+            patched_time.monotonic.side_effect = lambda: clock[0]
+            events = run_consumer(['m1', 'm2', 'm3', 'm4'], callback, ack_batch_size=10, ack_batch_ms=100)
+        self.assertEqual([event for event in events if event[0] != 'callback'],
+                         [('receive', 'm1'), ('receive', 'm2'), ('receive', 'm3'), ('ack',),
+                          ('receive', 'm4'), ('ack',)])
+
+    def test_ack_after_retry(self):
+        """
+        Test failed message is retried and acked only once it succeeds
+        """
+        events = self._run(['m1'], [CONSUMER_STATUS.FAILED, CONSUMER_STATUS.SUCCESS])
+        self.assertEqual(events, [('receive', 'm1'), ('callback', 'm1'), ('callback', 'm1'), ('ack',)])
+
+    def test_success_stop_acks_batch(self):
+        """
+        Test SUCCESS_STOP acks pending batch and stops
+        """
+        events = self._run(['m1', 'm2', 'm3'], [CONSUMER_STATUS.SUCCESS, CONSUMER_STATUS.SUCCESS_STOP],
+                           ack_batch_size=10)
+        self.assertEqual([event for event in events if event[0] != 'callback'],
+                         [('receive', 'm1'), ('receive', 'm2'), ('ack',)])
+
+    def test_failed_stop_skips_batch_ack(self):
+        """
+        Test FAILED_STOP does not ack, ack would commit failed message too
+        """
+        events = self._run(['m1', 'm2', 'm3'], [CONSUMER_STATUS.SUCCESS, CONSUMER_STATUS.FAILED_STOP],
+                           ack_batch_size=10)
+        self.assertEqual([event for event in events if event[0] != 'callback'],
+                         [('receive', 'm1'), ('receive', 'm2')])
+
+class TestMessageBusConsumerWorkers(unittest.TestCase):
+    """
+    Unit test for callbacks run on worker threads with worker_count
+    """
+
+    def setUp(self):
+        patcher = patch('ha.util.message_bus.Log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_order_per_key(self):
+        """
+        Test messages with same ordering key are processed in order on one worker
+        """
+        threads = {}
+        def callback(message):
+            threads.setdefault(message[0], set()).add(threading.current_thread().name)
+            return CONSUMER_STATUS.SUCCESS
+        messages = [(key, index) for index in range(10) for key in ('a', 'b', 'c')]
+        events = run_consumer(messages, callback, worker_count=2, ordering_key=lambda message: message[0])
+        processed = [event[1] for event in events if event[0] == 'callback']
+        self.assertEqual(sorted(processed), sorted(messages))
+        for key in ('a', 'b', 'c'):
+            self.assertEqual([index for k, index in processed if k == key], list(range(10)))
+            self.assertEqual(len(threads[key]), 1)
+
+    def test_ack_after_window(self):
+        """
+        Test ack is sent only after all messages in flight are processed
+        """
+        events = run_consumer(['m1', 'm2', 'm3'], lambda message: CONSUMER_STATUS.SUCCESS, worker_count=3)
+        self.assertEqual(events[-1], ('ack',))
+        self.assertEqual(len([event for event in events if event[0] == 'callback']), 3)
+        self.assertEqual(events.count(('ack',)), 1)
+
+    def test_failed_stop(self):
+        """
+        Test FAILED_STOP from a worker stops consumer, messages already queued
+        on workers are not processed and nothing is acked
+        """
+        def callback(message):
+            if message == 'm1':
+                # Let the other messages get queued on the worker.
+                time.sleep(0.05)
+                return CONSUMER_STATUS.FAILED_STOP
+            return CONSUMER_STATUS.SUCCESS
+        events = run_consumer(['m1', 'm2', 'm3', 'm4'], callback, worker_count=1)
+        self.assertEqual([event for event in events if event[0] == 'callback'], [('callback', 'm1')])
+        self.assertNotIn(('ack',), events)
+
+class TestConsumerMultiplexer(unittest.TestCase):
+    """
+    Unit test for message types sharing one consumer with ConsumerMultiplexer
+    """
+
+    def setUp(self):
+        for target in ('ha.util.message_bus.Log', 'ha.util.message_bus.MessageConsumer'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(MessageBus, '_multiplexers', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.events = []
+
+    def _route(self, message):
+        return message[0]
+
+    def _multiplexer(self, statuses: dict) -> ConsumerMultiplexer:
+        """
+        Get multiplexer with message types 'a' and 'b', callback of a message type
+        returns status from statuses for message and SUCCESS by default.
+        """
+        multiplexer = MessageBus.get_multiplexer(1, "test_group", self._route)
+        for message_type in ('a', 'b'):
+            def callback(message, message_type=message_type):
+                self.events.append((message_type, message))
+                return statuses.get(message, CONSUMER_STATUS.SUCCESS)
+            multiplexer.add(message_type, callback)
+        return multiplexer
+
+    def test_route(self):
+        """
+        Test every message is passed to callback of its message type and acked
+        """
+        multiplexer = self._multiplexer({})
+        drive_consumer(multiplexer, [('a', 1), ('b', 1), ('a', 2)], self.events)
+        self.assertEqual(self.events, [('receive', ('a', 1)), ('a', ('a', 1)), ('ack',),
+                                       ('receive', ('b', 1)), ('b', ('b', 1)), ('ack',),
+                                       ('receive', ('a', 2)), ('a', ('a', 2)), ('ack',)])
+
+    def test_success_stop(self):
+        """
+        Test SUCCESS_STOP stops only its message type, a later message of it
+        stops multiplexer without ack
+        """
+        multiplexer = self._multiplexer({('a', 1): CONSUMER_STATUS.SUCCESS_STOP})
+        drive_consumer(multiplexer, [('a', 1), ('b', 1), ('a', 2), ('b', 2)], self.events)
+        self.assertEqual(self.events, [('receive', ('a', 1)), ('a', ('a', 1)), ('ack',),
+                                       ('receive', ('b', 1)), ('b', ('b', 1)), ('ack',),
+                                       ('receive', ('a', 2))])
+
+    def test_failed_stop(self):
+        """
+        Test FAILED_STOP of one message type stops multiplexer without ack
+        """
+        multiplexer = self._multiplexer({('a', 1): CONSUMER_STATUS.FAILED_STOP})
+        drive_consumer(multiplexer, [('a', 1), ('b', 1)], self.events)
+        self.assertEqual(self.events, [('receive', ('a', 1)), ('a', ('a', 1))])
+
+    def test_get_multiplexer(self):
+        """
+        Test multiplexer is shared per consumer group till it stops
+        """
+        multiplexer = MessageBus.get_multiplexer(1, "test_group", self._route)
+        self.assertIs(MessageBus.get_multiplexer(2, "test_group", self._route), multiplexer)
+        self.assertIsNot(MessageBus.get_multiplexer(1, "other_group", self._route), multiplexer)
+        with self.assertRaises(Exception):
+            MessageBus.get_multiplexer(1, "test_group", lambda message: message[0])
+        with self.assertRaises(Exception):
+            MessageBus.get_multiplexer(1, "test_group", self._route, deserializer=SERIALIZER.JSON)
+        multiplexer.stop()
+        self.assertIsNot(MessageBus.get_multiplexer(1, "test_group", self._route), multiplexer)
+
+    def test_evict_after_run(self):
+        """
+        Test multiplexer is not given out once its consumer loop ends
+        """
+        multiplexer = self._multiplexer({})
+        drive_consumer(multiplexer, [('a', 1)], self.events)
+        self.assertIsNot(MessageBus.get_multiplexer(1, "test_group", self._route), multiplexer)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Seagate Technology LLC and/or its Affiliates
+#
+# This program is free software: you can redistribute it and/or modify it under the
+# terms of the GNU Affero General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+# PARTICULAR PURPOSE. See the GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License along
+# with this program. If not, see <https://www.gnu.org/licenses/>. For any questions
+# about this software or licensing, please email opensource@seagate.com or
+# cortx-questions@seagate.com.
+
+
+"""
+ ****************************************************************************
+ Description:       Mock health event publisher input file loading
+ ****************************************************************************
+"""
+
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ha.util.health_generator import mock_health_event_publisher
+from ha.util.health_generator.mock_health_event_publisher import load_events
+
+EVENTS = '{"e1": {"source": "hw", "node_id": "n1"}, "e2": {"source": "sw", "node_id": "n2"}}'
+
+class TestLoadEvents(unittest.TestCase):
+    """
+    Unit test for delay and events read from mock health event input file
+    """
+
+    def _load(self, content: str) -> tuple:
+        """
+        Write content to a temporary file and load it.
+        Returns: delay, list of events or None
+        """
+        with tempfile.TemporaryFile() as fi:
+            fi.write(content.encode())
+            fi.seek(0)
+            delay, events = load_events(fi)
+            return delay, None if events is None else list(events)
+
+    def _check(self):
+        expected = [{'source': 'hw', 'node_id': 'n1'}, {'source': 'sw', 'node_id': 'n2'}]
+        self.assertEqual(self._load('{"delay": 2.5, "events": ' + EVENTS + '}'), (2.5, expected))
+        self.assertEqual(self._load('{"events": ' + EVENTS + ', "delay": 2.5}'), (2.5, expected))
+        self.assertEqual(self._load('{"events": ' + EVENTS + '}'), (0, expected))
+        self.assertEqual(self._load('{"delay": 1}'), (1, None))
+        self.assertEqual(self._load('{}'), (0, None))
+
+    def test_load_events(self):
+        """
+        Test delay and events are read in either key order and when missing
+        """
+        self._check()
+
+    @unittest.skipIf(mock_health_event_publisher.ijson is None, "ijson is not installed")
+    def test_load_events_incremental(self):
+        """
+        Test incremental parsing gives same delay and events as full parsing
+        """
+        with patch.object(mock_health_event_publisher, '_ijson_min_file_size', 0):
+            self._check()
+
+if __name__ == "__main__":
+    unittest.main()
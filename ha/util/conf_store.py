@@ -123,12 +123,42 @@ class ConftStoreSearch:
         return cvg_count
 
     @staticmethod
-    def get_cvg_list(index, node_id):
+    def get_node_storage(index, node_id):
+        """
+        Return storage config of any given node in a single conf store read,
+        it can be passed to get_cvg_list and get_disk_list.
+        Args:
+            index(str): index of conf file
+            node_id (str): node id
+        Returns:
+            dict: storage config of the node
+        """
+        return Conf.get(index, GconfKeys.NODE_STORAGE.value.format(_DELIM=_DELIM, node_id=node_id))
+
+    @staticmethod
+    def _get_storage_cvgs(storage, node_id):
+        """Return CVG configs listed in storage config of the node."""
+        cvg_count = storage.get('num_cvg') if storage else None
+        if not cvg_count:
+            Log.warn(f"CVGs are not available for this node {node_id}")
+            return []
+        return storage.get('cvg', [])[:cvg_count]
+
+    @staticmethod
+    def _get_cvg_devices(cvg, device_type):
+        """Return data or metadata devices of CVG config."""
+        devices = cvg.get('devices', {})
+        count = devices.get(f'num_{device_type}')
+        return devices.get(device_type, [])[:count] if count else []
+
+    @staticmethod
+    def get_cvg_list(index, node_id, storage=None):
         """
         Return list of CVG's for any given node.
         Args:
             index(str): index of conf file
             node_id (str): node id
+            storage (dict): storage config from get_node_storage, optional.
         Returns:
             list: list of CVG's
 
@@ -137,6 +167,8 @@ class ConftStoreSearch:
         """
         cvg_list = []
         try:
+            if storage is not None:
+                return [cvg.get('name') for cvg in ConftStoreSearch._get_storage_cvgs(storage, node_id)]
             cvg_count = ConftStoreSearch._get_cvg_count(index, node_id)
             if cvg_count:
                 cvg_list = [Conf.get(index, GconfKeys.CVG_NAME.value.format
@@ -169,12 +201,13 @@ class ConftStoreSearch:
         return mdisk_list
 
     @staticmethod
-    def get_disk_list(index, node_id):
+    def get_disk_list(index, node_id, storage=None):
         """
         Return list of disks for any given node
         Args:
             index(str): index of conf file
             node_id (str): node id
+            storage (dict): storage config from get_node_storage, optional.
         Returns:
             list: list of disks id's
 
@@ -183,6 +216,11 @@ class ConftStoreSearch:
         """
         disk_list = []
         try:
+            if storage is not None:
+                for cvg in ConftStoreSearch._get_storage_cvgs(storage, node_id):
+                    disk_list.extend(ConftStoreSearch._get_cvg_devices(cvg, 'data'))
+                    disk_list.extend(ConftStoreSearch._get_cvg_devices(cvg, 'metadata'))
+                return disk_list
             cvg_count = ConftStoreSearch._get_cvg_count(index, node_id)
             if cvg_count:
                 for cvg_index in range(cvg_count):
@@ -37,6 +37,16 @@ class FencingAgent:
         """
         pass
 
+    def power_off_many(self, node_ids: list):
+        """
+        Power OFF nodes with nodeids
+
+        Args:
+            node_ids (list): Node IDs from cluster nodes.
+        """
+        for node_id in node_ids:
+            self.power_off(node_id)
+
     def power_on(self, node_id: str):
         """
         Power ON node with nodeid
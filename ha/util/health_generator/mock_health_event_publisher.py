@@ -20,18 +20,31 @@
 
 
 import argparse
+import os
 import sys
 import pathlib
 import errno
 import json
+import mmap
 import time
 
+try:
+    # Optional, lets big input files be parsed incrementally.
+    import ijson
+except ImportError:
+    ijson = None
+try:
+    # Optional, faster JSON parsing and encoding.
+    import orjson
+except ImportError:
+    orjson = None
+
 from cortx.utils.conf_store import Conf
 from cortx.utils.event_framework.health import HealthAttr, HealthEvent
 from ha.util.conf_store import ConftStoreSearch
 from ha.core.config.config_manager import ConfigManager
 from ha import const
-from ha.util.message_bus import MessageBus
+from ha.util.message_bus import MessageBus, MessageBusProducer
 from ha.core.system_health.const import HEALTH_STATUSES
 
 docker_env_file = '/.dockerenv'
@@ -46,6 +59,20 @@ _resource_id_key = 'resource_id'
 _resource_status_key = 'resource_status'
 _specific_info_key = 'specific_info'
 _delay_key = 'delay'
+_publish_batch_size = 256
+# Smaller input files are parsed at once, ijson is used only for bigger ones.
+_ijson_min_file_size = 64 * 1024 * 1024
+# Health event payload keys, formatted once instead of for every event.
+_source_attr = f'{HealthAttr.SOURCE}'
+_cluster_id_attr = f'{HealthAttr.CLUSTER_ID}'
+_site_id_attr = f'{HealthAttr.SITE_ID}'
+_rack_id_attr = f'{HealthAttr.RACK_ID}'
+_storageset_id_attr = f'{HealthAttr.STORAGESET_ID}'
+_node_id_attr = f'{HealthAttr.NODE_ID}'
+_resource_type_attr = f'{HealthAttr.RESOURCE_TYPE}'
+_resource_id_attr = f'{HealthAttr.RESOURCE_ID}'
+_resource_status_attr = f'{HealthAttr.RESOURCE_STATUS}'
+_health_status_values = frozenset(status.value for status in HEALTH_STATUSES)
 
 def is_container_env() -> bool:
     """Returns True if environment is docker container else False."""
@@ -86,7 +113,8 @@ def get_disks(args: argparse.Namespace) -> None:
     conf_store: ConftStoreSearch object
     node_id: machine_id value
     """
-    disk_ids = ConftStoreSearch.get_disk_list(_index, args.node_id)
+    storage = ConftStoreSearch.get_node_storage(_index, args.node_id)
+    disk_ids = ConftStoreSearch.get_disk_list(_index, args.node_id, storage)
     print(disk_ids)
 
 def get_cvgs(args: argparse.Namespace) -> None:
@@ -97,9 +125,66 @@ def get_cvgs(args: argparse.Namespace) -> None:
     conf_store: ConftStoreSearch object
     node_id: machine_id value
     """
-    cvg_ids = ConftStoreSearch.get_cvg_list(_index, args.node_id)
+    storage = ConftStoreSearch.get_node_storage(_index, args.node_id)
+    cvg_ids = ConftStoreSearch.get_cvg_list(_index, args.node_id, storage)
     print(cvg_ids)
 
+def load_events(fi) -> (float, object):
+    """
+    Reads the delay and the events from the input file.
+    When ijson is installed and the file is big the events are parsed
+    lazily while they are published instead of loading the whole file in
+    memory. Top level keys are scanned first and the scan stops at the
+    events key when delay precedes it. If delay follows the events or is
+    missing the scan parses the events too, so the events are read twice.
+
+    Args:
+    fi: input file opened in binary mode
+
+    Returns: delay, iterable of events or None if file has no events
+    """
+    if ijson is None or os.fstat(fi.fileno()).st_size < _ijson_min_file_size:
+        if orjson is None:
+            events_dict = json.load(fi)
+        else:
+            # Parse straight from the page cache without reading a copy.
+            with mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                events_dict = orjson.loads(view)
+        delay = events_dict.get(_delay_key, 0)
+        if _events_key not in events_dict:
+            return delay, None
+        return delay, events_dict[_events_key].values()
+    # 'delay' may follow the events, scan the top level keys first.
+    keys = set()
+    delay = None
+    for prefix, event, value in ijson.parse(fi, use_float=True):
+        if prefix == '' and event == 'map_key':
+            keys.add(value)
+            if value == _events_key and delay is not None:
+                break
+        elif prefix == _delay_key and event == 'number':
+            delay = value
+            if _events_key in keys:
+                break
+    if delay is None:
+        delay = 0
+    if _events_key not in keys:
+        return delay, None
+    fi.seek(0)
+    return delay, (value for _, value in ijson.kvitems(fi, _events_key, use_float=True))
+
+def publish_batch(message_producer: MessageBusProducer, batch: list) -> None:
+    """
+    Publishes health events in one message bus send.
+
+    Args:
+    message_producer: MessageBusProducer object
+    batch: list of health event json strings
+    """
+    for message in batch:
+        print(f"Publishing health event {message}")
+    message_producer.publish_many(batch)
+
 def publish(args: argparse.Namespace) -> None:
     """
     publishes the message on the message bus.
@@ -109,9 +194,9 @@ def publish(args: argparse.Namespace) -> None:
     conf_store: ConftStoreSearch object
     """
     try:
-        with open(args.file, 'r') as fi:
-            events_dict = json.load(fi)
-            if _events_key in events_dict.keys():
+        with open(args.file, 'rb') as fi:
+            delay, events = load_events(fi)
+            if events is not None:
                 ConfigManager.init(None)
                 MessageBus.init()
                 message_type = Conf.get(const.HA_GLOBAL_INDEX, f'FAULT_TOLERANCE{const._DELIM}message_type')
@@ -120,37 +205,44 @@ def publish(args: argparse.Namespace) -> None:
                 site_id = Conf.get(const.HA_GLOBAL_INDEX, f'COMMON_CONFIG{const._DELIM}site_id')
                 rack_id = Conf.get(const.HA_GLOBAL_INDEX, f'COMMON_CONFIG{const._DELIM}rack_id')
                 storageset_id = '1' # TODO: Read from config when available.
-                for _, value in events_dict[_events_key].items():
-                    resource_type = value[_resource_type_key]
-                    resource_type_list = Conf.get(const.HA_GLOBAL_INDEX, f"CLUSTER{const._DELIM}resource_type")
-                    if resource_type not in resource_type_list:
-                        raise Exception(f'Invalid resource_type: {resource_type}')
-                    resource_status = value[_resource_status_key]
-                    status_supported = False
-                    for status in list(HEALTH_STATUSES):
-                        if resource_status == status.value:
-                            status_supported = True
-                            break
-                    if status_supported is False:
-                        raise Exception(f'Invalid resource_status: {resource_status}')
-                    payload = {
-                        f'{HealthAttr.SOURCE}': value[_source_key],
-                        f'{HealthAttr.CLUSTER_ID}': cluster_id,
-                        f'{HealthAttr.SITE_ID}': site_id,
-                        f'{HealthAttr.RACK_ID}': rack_id,
-                        f'{HealthAttr.STORAGESET_ID}': storageset_id,
-                        f'{HealthAttr.NODE_ID}': value[_node_id_key],
-                        f'{HealthAttr.RESOURCE_TYPE}': resource_type,
-                        f'{HealthAttr.RESOURCE_ID}': value[_resource_id_key],
-                        f'{HealthAttr.RESOURCE_STATUS}': resource_status
-                    }
-                    health_event = HealthEvent(**payload)
-                    health_event.set_specific_info(value[_specific_info_key])
-                    print(f"Publishing health event {health_event.json}")
-                    message_producer.publish(health_event.json)
-                    if _delay_key in events_dict.keys():
-                        print(f"Sleeping for {events_dict[_delay_key]} seconds")
-                        time.sleep(events_dict[_delay_key])
+                resource_types = frozenset(Conf.get(const.HA_GLOBAL_INDEX, f"CLUSTER{const._DELIM}resource_type"))
+                # Without a delay between events, publish them in batches
+                # to save a message bus round trip per event.
+                batch = []
+                try:
+                    for value in events:
+                        resource_type = value[_resource_type_key]
+                        if resource_type not in resource_types:
+                            raise Exception(f'Invalid resource_type: {resource_type}')
+                        resource_status = value[_resource_status_key]
+                        if resource_status not in _health_status_values:
+                            raise Exception(f'Invalid resource_status: {resource_status}')
+                        payload = {
+                            _source_attr: value[_source_key],
+                            _cluster_id_attr: cluster_id,
+                            _site_id_attr: site_id,
+                            _rack_id_attr: rack_id,
+                            _storageset_id_attr: storageset_id,
+                            _node_id_attr: value[_node_id_key],
+                            _resource_type_attr: resource_type,
+                            _resource_id_attr: value[_resource_id_key],
+                            _resource_status_attr: resource_status
+                        }
+                        health_event = HealthEvent(**payload)
+                        health_event.set_specific_info(value[_specific_info_key])
+                        if delay:
+                            publish_batch(message_producer, [health_event.json])
+                            print(f"Sleeping for {delay} seconds")
+                            time.sleep(delay)
+                            continue
+                        batch.append(health_event.json)
+                        if len(batch) >= _publish_batch_size:
+                            batch, full_batch = [], batch
+                            publish_batch(message_producer, full_batch)
+                finally:
+                    # Events read before an invalid one are still published.
+                    if batch:
+                        publish_batch(message_producer, batch)
     except Exception as err:
         sys.stderr.write(f"Health event generator failed. Error: {err}\n")
         return errno.EINVAL
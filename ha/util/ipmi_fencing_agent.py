@@ -21,6 +21,8 @@
 
 import ast
 import json
+import subprocess
+from cortx.utils.log import Log
 from ha import const
 from ha.core.config.config_manager import ConfigManager
 from ha.execute import SimpleCommand
@@ -42,6 +44,45 @@ class IpmiFencingAgent(FencingAgent):
         super(IpmiFencingAgent, self).__init__()
         self._confstore = ConfigManager.get_confstore()
         self._execute = SimpleCommand()
+        self._bmc_info = {}
+
+    def _get_bmc_info(self, node_id: str) -> dict:
+        """
+        Get BMC info of node with nodeid, cached after first read.
+        Cache entry is dropped when ipmitool fails, so that credentials
+        changed in conf store are read again.
+
+        Args:
+            node_id (str): Node ID from cluster nodes.
+
+        Returns:
+            dict: BMC info, None if not available in conf store.
+        """
+        if node_id not in self._bmc_info:
+            bmc_info = self._confstore.get(f"{IpmiFencingAgent.NODE_BMC_INFO_KEY}/node/{node_id}")
+            if bmc_info is None:
+                return None
+            _, value = bmc_info.popitem()
+            try:
+                self._bmc_info[node_id] = json.loads(value)
+            except ValueError:
+                # Records stored as python dict literal by older versions.
+                self._bmc_info[node_id] = ast.literal_eval(value)
+        return self._bmc_info[node_id]
+
+    @staticmethod
+    def _ipmitool_cmd(bmc_info_dict: dict, *args) -> list:
+        """
+        Build ipmitool argument list, no shell is involved so
+        credentials are passed as is.
+
+        Args:
+            bmc_info_dict (dict): BMC info of the node.
+            args: ipmitool command, e.g. "chassis", "power", "off".
+        """
+        return ["ipmitool", "-I", "lanplus", "-H", bmc_info_dict[IpmiFencingAgent.IPMI_IPADDR],
+                "-U", bmc_info_dict[IpmiFencingAgent.IPMI_USER],
+                "-P", bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY], *args]
 
     def power_off(self, node_id: str):
         """
@@ -51,15 +92,50 @@ class IpmiFencingAgent(FencingAgent):
             node_id (str): private fqdn define in conf store.
         """
         try:
-            bmc_info = self._confstore.get(f"{IpmiFencingAgent.NODE_BMC_INFO_KEY}/node/{node_id}")
-            if bmc_info is not None:
-                _, value = bmc_info.popitem()
-                bmc_info_dict = ast.literal_eval(value)
-                self._execute.run_cmd(f"ipmitool -I lanplus -H {bmc_info_dict[IpmiFencingAgent.IPMI_IPADDR]} "
-                                      f"-U {bmc_info_dict[IpmiFencingAgent.IPMI_USER]} "
-                                      f"-P {bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY]} chassis power off")
+            bmc_info_dict = self._get_bmc_info(node_id)
+            if bmc_info_dict is not None:
+                self._execute.run_cmd(IpmiFencingAgent._ipmitool_cmd(bmc_info_dict, "chassis", "power", "off"),
+                                      secret=bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY])
+        except Exception as e:
+            self._bmc_info.pop(node_id, None)
+            raise Exception(f"Failed to run IPMItool Command. Error : {e}")
+
+    def power_off_many(self, node_ids: list):
+        """
+        Power OFF nodes with nodeids, ipmitool is started for all the nodes
+        before waiting on any, so total time is bounded by the slowest BMC.
+
+        Args:
+            node_ids (list): private fqdns define in conf store.
+        """
+        procs = {}
+        try:
+            for node_id in node_ids:
+                bmc_info_dict = self._get_bmc_info(node_id)
+                if bmc_info_dict is not None:
+                    cmd = IpmiFencingAgent._ipmitool_cmd(bmc_info_dict, "chassis", "power", "off")
+                    cmd_help = " ".join(cmd).replace(bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY], "****")
+                    procs[node_id] = (cmd_help, subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                                                 stderr=subprocess.PIPE, universal_newlines=True))
+            failed = {}
+            for node_id, (cmd_help, proc) in procs.items():
+                _output, _err = proc.communicate()
+                _rc = proc.returncode
+                Log.debug(f"cmd: {cmd_help}, output: {_output}, err: {_err}, rc: {_rc}")
+                if _rc != 0:
+                    Log.error(f"cmd: {cmd_help}, output: {_output}, err: {_err}, rc: {_rc}")
+                    failed[node_id] = _err.strip()
+            for node_id in failed:
+                self._bmc_info.pop(node_id, None)
+            if failed:
+                raise Exception(f"Power off failed for nodes {failed}")
         except Exception as e:
             raise Exception(f"Failed to run IPMItool Command. Error : {e}")
+        finally:
+            # Power off already started for other nodes is let to complete.
+            for _, proc in procs.values():
+                if proc.returncode is None:
+                    proc.communicate()
 
     def power_on(self, node_id: str):
         """
@@ -69,14 +145,12 @@ class IpmiFencingAgent(FencingAgent):
             node_id (str): Node ID from cluster nodes.
         """
         try:
-            bmc_info = self._confstore.get(f"{IpmiFencingAgent.NODE_BMC_INFO_KEY}/node/{node_id}")
-            if bmc_info is not None:
-                _, value = bmc_info.popitem()
-                bmc_info_dict = ast.literal_eval(value)
-                self._execute.run_cmd(f"ipmitool -I lanplus -H {bmc_info_dict[IpmiFencingAgent.IPMI_IPADDR]} "
-                                      f"-U {bmc_info_dict[IpmiFencingAgent.IPMI_USER]} "
-                                      f"-P {bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY]} chassis power on")
+            bmc_info_dict = self._get_bmc_info(node_id)
+            if bmc_info_dict is not None:
+                self._execute.run_cmd(IpmiFencingAgent._ipmitool_cmd(bmc_info_dict, "chassis", "power", "on"),
+                                      secret=bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY])
         except Exception as e:
+            self._bmc_info.pop(node_id, None)
             raise Exception(f"Failed to run IPMItool Command. Error : {e}")
 
     def power_status(self, node_id: str) -> str:
@@ -87,13 +161,10 @@ class IpmiFencingAgent(FencingAgent):
             node_id (str): Node ID from cluster nodes.
         """
         try:
-            bmc_info = self._confstore.get(f"{IpmiFencingAgent.NODE_BMC_INFO_KEY}/node/{node_id}")
-            if bmc_info is not None:
-                _, value = bmc_info.popitem()
-                bmc_info_dict = ast.literal_eval(value)
-                _output, _err, _rc = self._execute.run_cmd(f"ipmitool -I lanplus -H {bmc_info_dict[IpmiFencingAgent.IPMI_IPADDR]} "
-                                         f"-U {bmc_info_dict[IpmiFencingAgent.IPMI_USER]} "
-                                         f"-P {bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY]} chassis power status")
+            bmc_info_dict = self._get_bmc_info(node_id)
+            if bmc_info_dict is not None:
+                _output, _err, _rc = self._execute.run_cmd(IpmiFencingAgent._ipmitool_cmd(bmc_info_dict, "chassis", "power", "status"),
+                                                           secret=bmc_info_dict[IpmiFencingAgent.IPMI_AUTH_KEY])
                 if _rc != 0:
                     raise Exception(f"Failed to run IPMItool Command. Error : {_err}")
                 if const.SERVER_POWER_STATUS.ON.value in _output.lower():
@@ -103,6 +174,7 @@ class IpmiFencingAgent(FencingAgent):
                 else:
                     return const.SERVER_POWER_STATUS.UNKNOWN.value
         except Exception as e:
+            self._bmc_info.pop(node_id, None)
             raise Exception(f"Failed to run IPMItool Command. Error : {e}")
 
     def setup_ipmi_credentials(self, ipmi_ipaddr: str, ipmi_user: str, ipmi_password: str, node_name: str):
@@ -16,8 +16,13 @@
 # cortx-questions@seagate.com.
 
 import json
+import random
+import time
+import multiprocessing
 from typing import Callable
-from threading import Thread, Event
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Thread, Event, Lock, Timer
 from cortx.utils.conf_store.conf_store import Conf
 from cortx.utils.log import Log
 from cortx.utils.message_bus import MessageBusAdmin
@@ -26,6 +31,36 @@ from cortx.utils.message_bus import MessageConsumer
 from cortx.utils.message_bus import MessageBus as utils_message_bus
 from ha import const
 
+try:
+    # Optional, much faster JSON encoding of dict messages.
+    import orjson
+except ImportError:
+    orjson = None
+
+def _encode(message: dict) -> str:
+    """Encode dict message as JSON, using orjson when it is installed."""
+    if orjson is None:
+        return json.dumps(message)
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
+class SERIALIZER:
+    """
+    Wire format consumers decode dict messages from.
+    """
+    JSON = "json"
+
+def _check_serializer(serializer: str):
+    """Raise exception if serializer is unknown."""
+    if serializer not in (SERIALIZER.JSON,):
+        raise Exception(f"Invalid serializer {serializer}")
+
+# Send function of MessageBusProducer.publish per type of message.
+_PUBLISH_DISPATCH = {
+    dict: lambda producer, message: producer.producer.send([_encode(message)]),
+    str: lambda producer, message: producer.producer.send([message]),
+    list: lambda producer, message: producer.producer.send(message)
+}
+
 class MessageBusProducer:
     PRODUCER_METHOD = "sync"
 
@@ -39,6 +74,7 @@ class MessageBusProducer:
         Raises:
             MessageBusError: Message bus error.
         """
+        self._template = None
         self.producer = MessageProducer(producer_id=producer_id, message_type=message_type, method=MessageBusProducer.PRODUCER_METHOD)
 
     def publish(self, message: any):
@@ -50,14 +86,155 @@ class MessageBusProducer:
             If msg is string then it will be send directly.
             If message is list, it should have all string element, all items will be published.
         """
+        handler = _PUBLISH_DISPATCH.get(type(message))
+        if handler is None:
+            # Subclasses of supported types are not in dispatch table.
+            for message_class, handler in _PUBLISH_DISPATCH.items():
+                if isinstance(message, message_class):
+                    break
+            else:
+                raise Exception(f"Invalid type of message {message}")
+        handler(self, message)
+
+    def encode(self, message: any):
+        """
+        Encode single message the way publish sends it.
+        Args:
+            message (any): dict is dumped as json, string is sent as is.
+        """
         if isinstance(message, dict):
-            self.producer.send([json.dumps(message)])
+            return _encode(message)
         elif isinstance(message, str):
-            self.producer.send([message])
-        elif isinstance(message, list):
-            self.producer.send(message)
+            return message
+        raise Exception(f"Invalid type of message {message}")
+
+    def prepare_template(self, static_fields: dict) -> Callable:
+        """
+        Prepare encoder for dict messages which share static_fields, static part
+        is encoded once here instead of for every message. It is also used by
+        publish_templated.
+        Args:
+            static_fields (dict): fields same in every message.
+        Returns:
+            Callable: encodes dict of varying fields merged with static_fields,
+                varying fields take precedence.
+        """
+        if static_fields:
+            # '{"k1":v1,"k2":v2' and varying fields get spliced in as ',"k3":v3}'.
+            prefix = _encode(static_fields)[:-1]
+            static_keys = static_fields.keys()
+            def encoder(varying: dict) -> str:
+                if not varying:
+                    return prefix + "}"
+                if static_keys & varying.keys():
+                    # Splicing would repeat overridden keys.
+                    return _encode({**static_fields, **varying})
+                return prefix + "," + _encode(varying)[1:]
         else:
-            raise Exception(f"Invalid type of message {message}")
+            encoder = _encode
+        self._template = encoder
+        return encoder
+
+    def publish_templated(self, varying: dict):
+        """
+        Produce message made of template from prepare_template and varying fields.
+        Args:
+            varying (dict): fields which differ in every message.
+        """
+        if self._template is None:
+            raise Exception("Template is not prepared, call prepare_template first")
+        self.producer.send([self._template(varying)])
+
+    def publish_many(self, messages: list):
+        """
+        Produce several messages to message bus with a single send.
+        Args:
+            messages (list): dict or string messages, encoded as in publish.
+        """
+        if messages:
+            self.producer.send([self.encode(message) for message in messages])
+
+class BatchingProducer:
+    """
+    Coalesce messages published within a short time window into one send.
+    Messages are sent once max_messages or max_bytes is buffered, or linger
+    seconds after the first buffered message. A send has at most max_messages
+    and reaches max_bytes only by its last message. Call flush before exit so
+    no buffered message is lost.
+    """
+
+    def __init__(self, producer: MessageBusProducer, max_messages: int = 100,
+                 max_bytes: int = 16 * 1024, linger: float = 0.005):
+        """
+        Initialize batching producer.
+        Args:
+            producer (MessageBusProducer): producer used to send batches.
+            max_messages (int, optional): Messages per batch. Defaults to 100.
+            max_bytes (int, optional): Encoded bytes per batch. Defaults to 16KB.
+            linger (float, optional): Max seconds a message waits. Defaults to 5ms.
+        """
+        self.producer = producer
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self._batch = deque()
+        self._batch_bytes = 0
+        self._lock = Lock()
+        # Held while a batch is sent so that batches go out in order.
+        self._send_lock = Lock()
+        self._timer = None
+
+    def publish(self, message: any):
+        """
+        Buffer message, it is sent with the next batch.
+        Args:
+            message (any): dict or string message, encoded as in MessageBusProducer.publish.
+        """
+        encoded = self.producer.encode(message)
+        with self._lock:
+            self._batch.append(encoded)
+            self._batch_bytes += len(encoded)
+            full = len(self._batch) >= self.max_messages or self._batch_bytes >= self.max_bytes
+            if not full and self._timer is None:
+                self._timer = Timer(self.linger, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Send all buffered messages now.
+        """
+        with self._send_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = list(self._batch)
+                self._batch.clear()
+                self._batch_bytes = 0
+            # Other publishers may buffer more messages before a full batch
+            # gets flushed, split it so that sends keep the limits.
+            send = self.producer.producer.send
+            chunk = []
+            chunk_bytes = 0
+            for encoded in batch:
+                chunk.append(encoded)
+                chunk_bytes += len(encoded)
+                if len(chunk) >= self.max_messages or chunk_bytes >= self.max_bytes:
+                    send(chunk)
+                    chunk = []
+                    chunk_bytes = 0
+            if chunk:
+                send(chunk)
+
+    def _flush_on_timer(self):
+        """Flush from linger timer thread, where errors can only be logged."""
+        try:
+            self.flush()
+        except Exception as e:
+            Log.error(f"Failed to send batch of messages. Error: {e}")
 
 class CONSUMER_STATUS:
     SUCCESS = "success"
@@ -66,9 +243,22 @@ class CONSUMER_STATUS:
     SUCCESS_STOP = "success_stop"
 
 class MessageBusConsumer:
+    # Bounds in seconds of the backoff between retries of a failed message.
+    RETRY_DELAY_MIN = 0.05
+    RETRY_DELAY_MAX = 5.0
+    # Seconds receive waits for a message before stop is checked again.
+    POLL_INTERVAL = 0.1
+    # Poll timeout in seconds while flushing on stop, first empty poll ends
+    # flush so it is long enough for broker to return pending messages.
+    FLUSH_POLL_TIMEOUT = 1
+    # Max messages in flight with worker_count, they are acked together.
+    WORKER_WINDOW = 100
 
     def __init__(self, consumer_id: int, consumer_group: str, message_type: str,
-                callback: Callable, auto_ack: bool, offset: str, timeout: int):
+                callback: Callable, auto_ack: bool, offset: str, timeout: int,
+                deserializer: str = None, poll_interval: float = POLL_INTERVAL,
+                ack_batch_size: int = 1, ack_batch_ms: int = None,
+                worker_count: int = 0, ordering_key: Callable = None):
         """
         Initalize consumer.
         Args:
@@ -78,7 +268,24 @@ class MessageBusConsumer:
             callback (Callable): function to get message.
             auto_ack (bool, optional): Check auto ack. Defaults to False.
             offset (str, optional): Offset for messages. Defaults to "earliest".
+            deserializer (str, optional): Wire format to decode messages from before
+                callback. Defaults to None, callback gets the raw message.
+            poll_interval (float, optional): Max seconds stop takes to be noticed while
+                waiting for messages. Defaults to 0.1.
+            ack_batch_size (int, optional): Successful messages acked together. Defaults
+                to 1, every message is acked. Unacked messages are acked once no
+                message is received within poll_interval.
+            ack_batch_ms (int, optional): Max milliseconds a successful message waits for
+                ack. Defaults to None, no time bound.
+            worker_count (int, optional): Threads running callback, receive then does not
+                wait for callback. Defaults to 0, callback runs in consumer thread.
+            ordering_key (Callable, optional): With worker_count, messages with same
+                ordering_key(message) are processed in order by the same worker.
+                Defaults to None, messages are spread over workers without order.
         """
+        if deserializer is not None:
+            _check_serializer(deserializer)
+        self.deserializer = deserializer
         self.callback = callback
         self._stop = Event()
         self.flush_on_exit = False
@@ -89,6 +296,11 @@ class MessageBusConsumer:
         self.auto_ack = auto_ack
         self.offset = offset
         self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.ack_batch_size = ack_batch_size
+        self.ack_batch_ms = ack_batch_ms
+        self.worker_count = worker_count
+        self.ordering_key = ordering_key
         self.consumer_thread = None
 
     def run(self):
@@ -105,66 +317,232 @@ class MessageBusConsumer:
         7. Exception will be swallowed and ack.
         8. Closing main thread will close this thread as it is running as deamon.
 
-        As self.consumer.receive(timeout) is block call t1.join() will not stop thread.
+        self.consumer.receive waits at most poll_interval, so stop() takes effect
+        within poll_interval while waiting for messages.
+        Ack covers all messages received so far, hence batched acks are only sent
+        right after successful message, or when no message is received.
         Stop thread by completing work as per above cases.
         """
+        if self.worker_count:
+            self._run_workers()
+            if self.flush_on_exit:
+                self._flush_pending()
+            return
+        # Bound once, these are looked up for every message otherwise.
+        receive = self.consumer.receive
+        ack = self.consumer.ack
+        stopped = self._stop.is_set
+        cb = self.callback
+        # Raw messages go to callback without a deserialize call.
+        deserialize = None if self.deserializer is None else self._deserialize
+        poll_interval = self.poll_interval
+        success = CONSUMER_STATUS.SUCCESS
+        success_stop = CONSUMER_STATUS.SUCCESS_STOP
+        failed_stop = CONSUMER_STATUS.FAILED_STOP
+        monotonic = time.monotonic
+        ack_batch_size = self.ack_batch_size
+        ack_batch_secs = None if self.ack_batch_ms is None else self.ack_batch_ms / 1000
+        pending_acks = 0
+        # Time the oldest successful message waiting for ack was processed.
+        first_pending_time = None
         retry = False
-        while not self._stop.is_set():
+        retry_delay = MessageBusConsumer.RETRY_DELAY_MIN
+        while not stopped():
             try:
                 if not retry:
-                    # setting some default timeout as 0 will block the call for indefinite time
-                    message = self.consumer.receive(timeout=const.CORTX_HA_WAIT_TIMEOUT)
+                    # setting timeout as 0 will block the call for indefinite time,
+                    # short timeout keeps checking stop event in between.
+                    message = receive(timeout=poll_interval)
                     # if no message is received and the timeout occurs then message will be set None
                     # so lets continue wait again on message bus.
                     if message is None:
+                        if pending_acks:
+                            ack()
+                            pending_acks = 0
                         continue
+                    if deserialize is not None:
+                        message = deserialize(message)
                 try:
-                    status = self.callback(message)
+                    status = cb(message)
                 except Exception as e:
                     Log.error(f"Caught exception from caller: {e}. retry again ...")
                     retry = True
+                    retry_delay = self._wait_before_retry(retry_delay)
                     continue
-                if status == CONSUMER_STATUS.SUCCESS:
-                    self.consumer.ack()
-                elif status == CONSUMER_STATUS.FAILED_STOP:
+                if status == success:
+                    pending_acks += 1
+                    if pending_acks == 1 and ack_batch_secs is not None:
+                        first_pending_time = monotonic()
+                    if pending_acks >= ack_batch_size or \
+                            (ack_batch_secs is not None and monotonic() - first_pending_time >= ack_batch_secs):
+                        ack()
+                        pending_acks = 0
+                elif status == failed_stop:
                     # TODO: check if can be handled internally, currently message will get ack by message bus api
+                    # Ack would commit failed message as well, so earlier successful
+                    # messages waiting for batch ack are left unacked.
+                    pending_acks = 0
                     break
-                elif status == CONSUMER_STATUS.SUCCESS_STOP:
-                    self.consumer.ack()
+                elif status == success_stop:
+                    ack()
+                    pending_acks = 0
                     break
                 else:
                     retry = True
+                    retry_delay = self._wait_before_retry(retry_delay)
                     continue
                 retry = False
+                retry_delay = MessageBusConsumer.RETRY_DELAY_MIN
             except Exception as e:
                 Log.error(f"Supressing exception from message bus {e}")
                 retry = False
+                retry_delay = MessageBusConsumer.RETRY_DELAY_MIN
+        # Message being retried is not processed, acking would skip it.
+        if pending_acks and not retry:
+            try:
+                ack()
+            except Exception as e:
+                Log.error(f"Failed to ack processed messages {e}")
         if self.flush_on_exit:
-            # we do not expect any messages to be present in the message bus at this point
-            # since previously received cluster stop would have ensured that message bus is empty
-            # here we are makeing sure that messages in message bus are flushed,
-            # so when next time consumer starts it will not read stale messages.
-            Log.info(f"flush pending messages of type {self.message_type}.")
-            while True:
-                # needs to set minimum feasible timeout but,
-                # setting 0 will block the call for indefinite time,
-                # hence setting to 1.
-                message = self.consumer.receive(timeout=1)
-                if message is None:
-                    break
-                else:
-                    Log.info(f"flushing message: {message}.")
-                    self.consumer.ack()
+            self._flush_pending()
 
-    def start(self):
+    def _process(self, message):
         """
-        Start the consumer
+        Run callback in worker thread, retrying as run does.
+        Messages queued on a worker are not processed once consumer is
+        stopped, as run does not process messages after a stop status.
+        Returns:
+            str: final status, None if stopped before callback succeeded.
+        """
+        retry_delay = MessageBusConsumer.RETRY_DELAY_MIN
+        while not self._stop.is_set():
+            try:
+                status = self.callback(message)
+            except Exception as e:
+                Log.error(f"Caught exception from caller: {e}. retry again ...")
+                status = CONSUMER_STATUS.FAILED
+            if status in (CONSUMER_STATUS.SUCCESS, CONSUMER_STATUS.FAILED_STOP, CONSUMER_STATUS.SUCCESS_STOP):
+                return status
+            retry_delay = self._wait_before_retry(retry_delay)
+        return None
+
+    def _on_processed(self, future):
+        """
+        Done callback of worker, stops consumer if callback asked to.
+        """
+        if future.result() in (CONSUMER_STATUS.FAILED_STOP, CONSUMER_STATUS.SUCCESS_STOP):
+            self._stop.set()
+
+    def _ack_window(self, window: list):
+        """
+        Wait for messages in flight and ack them. Ack covers every received
+        message, so it is skipped if any of them is not done.
+        """
+        wait(window)
+        if all(future.result() in (CONSUMER_STATUS.SUCCESS, CONSUMER_STATUS.SUCCESS_STOP)
+               for future in window):
+            self.consumer.ack()
+        window.clear()
+
+    def _run_workers(self):
+        """
+        Receive messages and run callback on worker_count single thread
+        executors, so messages with same ordering key keep their order.
+        Messages are acked per window once all of them are processed.
+        """
+        receive = self.consumer.receive
+        stopped = self._stop.is_set
+        deserialize = self._deserialize
+        poll_interval = self.poll_interval
+        ordering_key = self.ordering_key
+        worker_count = self.worker_count
+        executors = [ThreadPoolExecutor(max_workers=1) for _ in range(worker_count)]
+        window = []
+        next_worker = 0
+        try:
+            while not stopped():
+                try:
+                    message = receive(timeout=poll_interval)
+                    if message is not None:
+                        message = deserialize(message)
+                        if ordering_key is None:
+                            worker = next_worker
+                            next_worker = (next_worker + 1) % worker_count
+                        else:
+                            worker = hash(ordering_key(message)) % worker_count
+                        future = executors[worker].submit(self._process, message)
+                        future.add_done_callback(self._on_processed)
+                        window.append(future)
+                        if len(window) < MessageBusConsumer.WORKER_WINDOW:
+                            continue
+                    if window:
+                        self._ack_window(window)
+                except Exception as e:
+                    Log.error(f"Supressing exception from message bus {e}")
+            # Drain messages in flight before exit.
+            if window:
+                self._ack_window(window)
+        except Exception as e:
+            Log.error(f"Failed to ack processed messages {e}")
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+    def _flush_pending(self):
+        """
+        Ack all messages left in the message bus for this consumer.
+        """
+        # we do not expect any messages to be present in the message bus at this point
+        # since previously received cluster stop would have ensured that message bus is empty
+        # here we are makeing sure that messages in message bus are flushed,
+        # so when next time consumer starts it will not read stale messages.
+        Log.info(f"flush pending messages of type {self.message_type}.")
+        receive = self.consumer.receive
+        ack = self.consumer.ack
+        drained = 0
+        while True:
+            # needs to set minimum feasible timeout but,
+            # setting 0 will block the call for indefinite time.
+            message = receive(timeout=MessageBusConsumer.FLUSH_POLL_TIMEOUT)
+            if message is None:
+                break
+            ack()
+            drained += 1
+        Log.info(f"flushed {drained} pending messages of type {self.message_type}.")
+
+    def _wait_before_retry(self, retry_delay: float) -> float:
+        """
+        Back off before retrying a failed message, stop() ends the wait early.
+        Args:
+            retry_delay (float): current delay in seconds, jitter makes the wait
+                anywhere between half of it and all of it.
+        Returns:
+            float: delay to use for the next retry.
+        """
+        self._stop.wait(random.uniform(retry_delay / 2, retry_delay))
+        return min(retry_delay * 2, MessageBusConsumer.RETRY_DELAY_MAX)
+
+    def _deserialize(self, message):
+        """Decode message from the consumer wire format, if any."""
+        if self.deserializer == SERIALIZER.JSON:
+            return json.loads(message)
+        return message
+
+    def _create_consumer(self):
+        """
+        Create message bus consumer used by run
         """
-        Log.info(f"Starting the daemon for {self.name}...")
         self.consumer = MessageConsumer(consumer_id=str(self.consumer_id),
                         consumer_group=self.consumer_group,
                         message_types=[self.message_type],
                         auto_ack=self.auto_ack, offset=self.offset)
+
+    def start(self):
+        """
+        Start the consumer
+        """
+        Log.info(f"Starting the daemon for {self.name}...")
+        self._create_consumer()
         self.consumer_thread = Thread(target=self.run, name=self.name)
         self.consumer_thread.setDaemon(True)
         self.consumer_thread.start()
@@ -188,8 +566,225 @@ class MessageBusConsumer:
             self.consumer_thread.join()
             Log.info(f"The daemon {self.name} is stopped successfully.")
 
+class MessageBusProcessConsumer:
+    """
+    Run MessageBusConsumer in a separate process, so CPU heavy callbacks of
+    different consumers are not serialized by the GIL. Message bus handles are
+    not fork safe, hence message bus and consumer are created in the child.
+    Callback runs in the child process, results can be sent back through
+    status_queue.
+    """
+
+    def __init__(self, consumer_id: int, consumer_group: str, message_type: str,
+                callback: Callable, auto_ack: bool, offset: str, timeout: int,
+                deserializer: str = None, status_queue: multiprocessing.Queue = None):
+        """
+        Initalize process consumer, args are same as MessageBusConsumer.
+        Args:
+            status_queue (multiprocessing.Queue, optional): If given, (message_type, status)
+                returned by callback for every message is put on it.
+        """
+        self._consumer_args = (consumer_id, consumer_group, message_type, callback,
+                               auto_ack, offset, timeout, deserializer)
+        self.callback = callback
+        self.message_type = message_type
+        self.status_queue = status_queue
+        self.name = message_type+"-consumer-process"
+        self._stop = multiprocessing.Event()
+        self._flush_on_exit = multiprocessing.Event()
+        self.consumer_process = None
+
+    def _callback(self, message):
+        """
+        Call callback and report its status to parent process.
+        """
+        status = self.callback(message)
+        if self.status_queue is not None:
+            self.status_queue.put((self.message_type, status))
+        return status
+
+    def _run(self):
+        """
+        Entry point of consumer process.
+        """
+        MessageBus.init()
+        args = list(self._consumer_args)
+        args[3] = self._callback
+        consumer = MessageBusConsumer(*args)
+        # Parent process stops consumer through shared event.
+        consumer._stop = self._stop
+        consumer._create_consumer()
+        consumer.run()
+        if self._flush_on_exit.is_set():
+            consumer._flush_pending()
+
+    def start(self):
+        """
+        Start the consumer process
+        """
+        Log.info(f"Starting the process for {self.name}...")
+        self.consumer_process = multiprocessing.Process(target=self._run, name=self.name)
+        self.consumer_process.daemon = True
+        self.consumer_process.start()
+        Log.info(f"The process {self.name} started successfully.")
+
+    def stop(self, flush=False):
+        """
+        Set the stop event so consumer process will stop
+        """
+        Log.info(f"Stopping the process {self.name}...")
+        if flush:
+            self._flush_on_exit.set()
+        self._stop.set()
+
+    def join(self):
+        """
+        Blocking call, waits for consumer process to exit
+        """
+        if self.consumer_process is not None:
+            Log.info(f"waiting for {self.name} to exit...")
+            self.consumer_process.join()
+            Log.info(f"The process {self.name} is stopped successfully.")
+
+class MessageBusParallelConsumer:
+    """
+    Group of consumers of one message type in the same consumer group, message
+    bus assigns each of them a disjoint set of partitions.
+    """
+
+    def __init__(self, consumers: list):
+        """
+        Initalize parallel consumer.
+        Args:
+            consumers (list): MessageBusConsumer objects.
+        """
+        self.consumers = consumers
+
+    def start(self):
+        """
+        Start all the consumers
+        """
+        for consumer in self.consumers:
+            consumer.start()
+
+    def stop(self, flush=False):
+        """
+        Set the stop event of all the consumers
+        """
+        for consumer in self.consumers:
+            consumer.stop(flush)
+
+    def join(self):
+        """
+        Blocking call, waits for all the consumer threads to exit
+        """
+        for consumer in self.consumers:
+            consumer.join()
+
+class ConsumerMultiplexer(MessageBusConsumer):
+    """
+    One message bus consumer shared by several message types of a consumer
+    group, saves a message bus client and poll thread per message type.
+    Message bus consumer gives message payload only, so route tells message
+    type of every message and it is passed to callback of that type.
+    Ack commits position of the shared consumer, i.e. messages of all types
+    received so far. So a message that must not be acked stops the whole
+    multiplexer: FAILED_STOP of any type, or a later message of a type that
+    returned SUCCESS_STOP while other types are still consumed.
+    """
+
+    def __init__(self, consumer_id: int, consumer_group: str, route: Callable,
+                auto_ack: bool = False, offset: str = "earliest", deserializer: str = None):
+        """
+        Initalize multiplexer, args are same as MessageBusConsumer.
+        Args:
+            route (Callable): returns message type of message.
+        """
+        super().__init__(consumer_id, consumer_group, "multiplexer", self._dispatch,
+                         auto_ack, offset, 0, deserializer)
+        self.name = consumer_group+"-consumer-multiplexer-thread"
+        self.route = route
+        self._callbacks = {}
+        self._message_types = []
+
+    def add(self, message_type: str, callback: Callable):
+        """
+        Pass messages of message type to callback. Callback returns CONSUMER_STATUS
+        as for MessageBusConsumer. SUCCESS_STOP stops only this message type till
+        another message of it is received, FAILED_STOP stops all message types.
+        Args:
+            message_type (str): Message Type.
+            callback (Callable): function to get message.
+        """
+        if self.consumer_thread is not None:
+            raise Exception(f"Can not add message type {message_type}, {self.name} is already started")
+        self._callbacks[message_type] = callback
+        self._message_types.append(message_type)
+
+    def _dispatch(self, message):
+        """
+        Callback of shared consumer, calls callback of message type.
+        """
+        message_type = self.route(message)
+        callback = self._callbacks.get(message_type)
+        if callback is None:
+            # Acking would commit the message for the next consumer of the
+            # stopped message type too, stop without ack instead.
+            Log.info(f"Received message of stopped message type {message_type}, stopping {self.name}.")
+            return CONSUMER_STATUS.FAILED_STOP
+        status = callback(message)
+        if status == CONSUMER_STATUS.SUCCESS_STOP:
+            Log.info(f"Stopped listening to message type {message_type}.")
+            del self._callbacks[message_type]
+            if self._callbacks:
+                # Other message types are still consumed.
+                return CONSUMER_STATUS.SUCCESS
+        return status
+
+    def run(self):
+        """
+        Run shared consumer, once it ends multiplexer is not given out anymore.
+        """
+        try:
+            super().run()
+        finally:
+            MessageBus._evict_multiplexer(self)
+
+    def stop(self, flush=False):
+        """
+        Set the stop event so consumer thread will stop, later get_multiplexer
+        calls create a new multiplexer.
+        """
+        MessageBus._evict_multiplexer(self)
+        super().stop(flush)
+
+    def _create_consumer(self):
+        """
+        Create message bus consumer of all added message types
+        """
+        if not self._message_types:
+            raise Exception(f"No message type is added to {self.name}")
+        self.consumer = MessageConsumer(consumer_id=str(self.consumer_id),
+                        consumer_group=self.consumer_group,
+                        message_types=self._message_types,
+                        auto_ack=self.auto_ack, offset=self.offset)
+
 class MessageBus:
     ADMIN_ID = "ha_admin"
+    # Message types known to be registered, saves admin round trip per producer.
+    _registered = set()
+    _registered_lock = Lock()
+    # Admin client shared by register and deregister.
+    _admin = None
+    _admin_lock = Lock()
+    # (time fetched, message types) of last list_message_types, reused for
+    # TOPIC_CACHE_TTL seconds so bulk register costs one admin round trip.
+    TOPIC_CACHE_TTL = 5
+    _topic_cache = None
+    _topic_cache_lock = Lock()
+    # ConsumerMultiplexer per (consumer_group, auto_ack, offset).
+    _multiplexers = {}
+    _multiplexers_lock = Lock()
 
     @staticmethod
     def init():
@@ -202,7 +797,11 @@ class MessageBus:
 
     @staticmethod
     def get_consumer(consumer_id: int, consumer_group: str, message_type: str,
-                callback: Callable, auto_ack: bool = False, offset: str = "earliest", timeout: int = 0) -> MessageBusConsumer:
+                callback: Callable, auto_ack: bool = False, offset: str = "earliest", timeout: int = 0,
+                deserializer: str = None,
+                poll_interval: float = MessageBusConsumer.POLL_INTERVAL,
+                ack_batch_size: int = 1, ack_batch_ms: int = None,
+                worker_count: int = 0, ordering_key: Callable = None) -> MessageBusConsumer:
         """
         Get consumer.
         Args:
@@ -213,8 +812,94 @@ class MessageBus:
             auto_ack (bool, optional): Check auto ack. Defaults to False.
             offset (str, optional): Offset for messages. Defaults to "earliest".
             timeout (int, optional): Max wait time for thread to wait for a message. Default: timeout is 0 and so call is blocking
+            deserializer (str, optional): SERIALIZER used by producers of message type,
+                callback then gets decoded message. Default: callback gets raw message.
+            poll_interval (float, optional): Max seconds stop takes to be noticed while waiting
+                for messages. Default: 0.1
+            ack_batch_size (int, optional): Successful messages acked together. Default: 1
+            ack_batch_ms (int, optional): Max milliseconds a successful message waits for ack.
+                Default: no time bound, pending acks are sent when message bus is idle.
+            worker_count (int, optional): Threads running callback in parallel, acks are then
+                sent per window of messages and ack_batch args are not used. Default: 0
+            ordering_key (Callable, optional): Messages with same ordering_key(message) are
+                processed in order with worker_count. Default: no order is kept.
         """
-        return MessageBusConsumer(consumer_id, consumer_group, message_type, callback, auto_ack, offset, timeout)
+        return MessageBusConsumer(consumer_id, consumer_group, message_type, callback, auto_ack, offset, timeout,
+                                  deserializer, poll_interval, ack_batch_size, ack_batch_ms,
+                                  worker_count, ordering_key)
+
+    @staticmethod
+    def get_parallel_consumer(num_workers: int, consumer_id: int, consumer_group: str, message_type: str,
+                callback: Callable, auto_ack: bool = False, offset: str = "earliest", timeout: int = 0,
+                deserializer: str = None) -> MessageBusParallelConsumer:
+        """
+        Get num_workers consumers sharing consumer group, so that partitions of
+        message type are consumed in parallel. Message type must have at least
+        num_workers partitions, extra consumers stay idle. Callback is called
+        from all consumer threads. Other args are same as get_consumer.
+        Args:
+            num_workers (int): Number of consumers.
+            consumer_id (int): Base consumer ID, consumers get "<consumer_id>-<index>".
+        """
+        consumers = []
+        for index in range(num_workers):
+            consumer = MessageBusConsumer(f"{consumer_id}-{index}", consumer_group, message_type, callback,
+                                          auto_ack, offset, timeout, deserializer)
+            consumer.name = f"{consumer.name}-{index}"
+            consumers.append(consumer)
+        return MessageBusParallelConsumer(consumers)
+
+    @staticmethod
+    def get_process_consumer(consumer_id: int, consumer_group: str, message_type: str,
+                callback: Callable, auto_ack: bool = False, offset: str = "earliest", timeout: int = 0,
+                deserializer: str = None, status_queue: multiprocessing.Queue = None) -> MessageBusProcessConsumer:
+        """
+        Get consumer which runs in its own process, for CPU bound callbacks.
+        Args are same as get_consumer.
+        Args:
+            status_queue (multiprocessing.Queue, optional): Queue to get (message_type, status)
+                of every callback call in the parent process.
+        """
+        return MessageBusProcessConsumer(consumer_id, consumer_group, message_type, callback, auto_ack, offset,
+                                         timeout, deserializer, status_queue)
+
+    @staticmethod
+    def get_multiplexer(consumer_id: int, consumer_group: str, route: Callable, auto_ack: bool = False,
+                offset: str = "earliest", deserializer: str = None) -> ConsumerMultiplexer:
+        """
+        Get consumer shared by message types of consumer group with same auto_ack and
+        offset, message types are added to it with add before it is started. Only first
+        call for a consumer group creates it, later calls get the same one till it is
+        stopped, consumer_id of first call is used.
+        Args:
+            consumer_id (int): Consumer ID.
+            consumer_group (str): Consumer Group.
+            route (Callable): returns message type of (deserialized) message.
+            auto_ack (bool, optional): Check auto ack. Defaults to False.
+            offset (str, optional): Offset for messages. Defaults to "earliest".
+            deserializer (str, optional): SERIALIZER used by producers of all message types.
+        Raises:
+            Exception: multiplexer of consumer group uses other route or deserializer.
+        """
+        key = (consumer_group, auto_ack, offset)
+        with MessageBus._multiplexers_lock:
+            multiplexer = MessageBus._multiplexers.get(key)
+            if multiplexer is None:
+                multiplexer = ConsumerMultiplexer(consumer_id, consumer_group, route, auto_ack, offset, deserializer)
+                MessageBus._multiplexers[key] = multiplexer
+            elif multiplexer.route != route or multiplexer.deserializer != deserializer:
+                raise Exception(f"{multiplexer.name} already exists with other route or deserializer")
+            return multiplexer
+
+    @staticmethod
+    def _evict_multiplexer(multiplexer: ConsumerMultiplexer):
+        """
+        Forget stopped multiplexer, so that it is not given out again.
+        """
+        key = (multiplexer.consumer_group, multiplexer.auto_ack, multiplexer.offset)
+        with MessageBus._multiplexers_lock:
+            if MessageBus._multiplexers.get(key) is multiplexer:
+                del MessageBus._multiplexers[key]
 
     @staticmethod
     def get_producer(producer_id: str, message_type: str, partitions: int = 1) -> MessageBusProducer:
@@ -230,6 +915,59 @@ class MessageBus:
         MessageBus.register(message_type, partitions)
         return MessageBusProducer(producer_id, message_type, partitions)
 
+    @staticmethod
+    def get_batching_producer(producer_id: str, message_type: str, partitions: int = 1,
+                              **batch_args) -> BatchingProducer:
+        """
+        Register message types with message bus. and get Producer which sends messages in batches.
+        Caller must call flush on it before exit.
+        Args:
+            producer_id (str): producer id.
+            message_types (str): Message type.
+            partitions (int, optional): No. of partitions. Defaults to 1.
+            batch_args: max_messages, max_bytes and linger of BatchingProducer.
+        """
+        producer = MessageBus.get_producer(producer_id, message_type, partitions)
+        return BatchingProducer(producer, **batch_args)
+
+    @staticmethod
+    def _get_admin() -> MessageBusAdmin:
+        """
+        Get admin client, it is created on first use and reused after that.
+        """
+        with MessageBus._admin_lock:
+            if MessageBus._admin is None:
+                MessageBus._admin = MessageBusAdmin(admin_id=MessageBus.ADMIN_ID)
+            return MessageBus._admin
+
+    @staticmethod
+    def _get_topics(force: bool = False) -> set:
+        """
+        Get registered message types, cached for TOPIC_CACHE_TTL seconds.
+        Args:
+            force (bool, optional): Fetch from message bus even if cache is fresh.
+        """
+        with MessageBus._topic_cache_lock:
+            cache = MessageBus._topic_cache
+            if not force and cache is not None and time.monotonic() - cache[0] < MessageBus.TOPIC_CACHE_TTL:
+                return cache[1]
+        topics = set(MessageBus._get_admin().list_message_types())
+        with MessageBus._topic_cache_lock:
+            MessageBus._topic_cache = (time.monotonic(), topics)
+        return topics
+
+    @staticmethod
+    def _update_topics(message_type: str, registered: bool):
+        """
+        Update cached message types after message type is registered or
+        deregistered, so that next register does not fetch them again.
+        """
+        with MessageBus._topic_cache_lock:
+            cache = MessageBus._topic_cache
+            if cache is not None:
+                topics = cache[1] | {message_type} if registered else cache[1] - {message_type}
+                MessageBus._topic_cache = (cache[0], topics)
+
     @staticmethod
     def register(message_type: str, partitions: int = 1):
         """
@@ -238,13 +976,18 @@ class MessageBus:
             message_type (str): Message type.
             partitions (int): Number of partition.
         """
-        admin = MessageBusAdmin(admin_id=MessageBus.ADMIN_ID)
+        with MessageBus._registered_lock:
+            if message_type in MessageBus._registered:
+                return
         try:
-            if message_type not in admin.list_message_types():
-                admin.register_message_type(message_types=[message_type], partitions=partitions)
+            if message_type not in MessageBus._get_topics():
+                MessageBus._get_admin().register_message_type(message_types=[message_type], partitions=partitions)
+                MessageBus._update_topics(message_type, True)
         except Exception as e:
             if "TOPIC_ALREADY_EXISTS" not in str(e):
                 raise(e)
+        with MessageBus._registered_lock:
+            MessageBus._registered.add(message_type)
 
     @staticmethod
     def deregister(message_type: str):
@@ -253,6 +996,9 @@ class MessageBus:
         Args:
             message_type (str): Message type.
         """
-        admin = MessageBusAdmin(admin_id=MessageBus.ADMIN_ID)
-        if message_type in admin.list_message_types():
-            admin.deregister_message_type(message_types=[message_type])
+        with MessageBus._registered_lock:
+            MessageBus._registered.discard(message_type)
+        # Cached list may miss message type registered meanwhile by other process.
+        if message_type in MessageBus._get_topics(force=True):
+            MessageBus._get_admin().deregister_message_type(message_types=[message_type])
+            MessageBus._update_topics(message_type, False)